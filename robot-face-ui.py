@@ -7,21 +7,117 @@ import pygame
 import argparse
 import threading
 
-from queue          import Queue, Empty
-from rclpy.node     import Node
-from std_msgs.msg   import String
+from typing             import Optional
+from concurrent.futures import ThreadPoolExecutor
+from pygame._sdl2.video import Window, Renderer, Texture
+from rclpy.node         import Node
+from std_msgs.msg       import String
 
 SCRIPT_DIR      = os.path.dirname(os.path.abspath(__file__))
 DEFAULT_DIR     = os.path.join(SCRIPT_DIR, "expressions")
 
 DEFAULT_MOOD            = "BLANK"
 DEFAULT_FRAME_DELAY_MS  = 100
+RGB565_DEPTH            = 16
+PRESCALE_LIMIT_MB       = 256
+FRAME_EVENT             = pygame.USEREVENT + 1
+
+_IMG_CACHE: dict = {}
+_MOODS_CACHE: dict = {}
+
+
+def _decode_frame(path: str, size: Optional[tuple]) -> pygame.Surface:
+    frame = pygame.image.load(path)
+    if size is not None and frame.get_size() != size:
+        frame = pygame.transform.smoothscale(frame, size)
+    return frame
+
+
+def _load_moods_cached(
+    mood_paths: dict,
+    size: Optional[tuple],
+    depth: int,
+    renderer: Optional[Renderer] = None,
+) -> dict:
+    # Moods may share frames (e.g. symlinked), so each file is decoded once.
+    mood_keys = {
+        name: [(os.path.realpath(path), size, depth, renderer) for path in paths]
+        for name, paths in mood_paths.items()
+    }
+    missing = {}
+    for name, paths in mood_paths.items():
+        for key, path in zip(mood_keys[name], paths):
+            if key not in _IMG_CACHE:
+                missing.setdefault(key, path)
+
+    if missing:
+        # Decoding and scaling release the GIL and run in worker threads;
+        # convert() depends on the display and stays on the calling thread.
+        with ThreadPoolExecutor(max_workers=os.cpu_count()) as pool:
+            decoded = dict(zip(
+                missing.keys(),
+                pool.map(_decode_frame, missing.values(), [size] * len(missing)),
+            ))
+
+        # Each decoded surface is popped as it is converted, so peak memory
+        # stays near the converted total that PRESCALE_LIMIT_MB checks.
+        for key in list(decoded):
+            frame = decoded.pop(key)
+            if renderer is not None:
+                # Frames are uploaded once as textures; the surfaces are dropped.
+                _IMG_CACHE[key] = Texture.from_surface(renderer, frame)
+            else:
+                # JPEGs carry no alpha: convert() keeps blits on the opaque path.
+                _IMG_CACHE[key] = frame.convert(depth) if depth else frame.convert()
+
+    return {
+        name: [_IMG_CACHE[key] for key in keys]
+        for name, keys in mood_keys.items()
+    }
+
+
+def _prefetch_file(path: str) -> None:
+    # Hint the kernel to start reading the file before it is decoded.
+    if not hasattr(os, "posix_fadvise"):
+        return
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+    finally:
+        os.close(fd)
+
+
+class MoodSlot:
+    # Only the newest mood matters, so a single guarded slot replaces a queue.
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._event = threading.Event()
+        self._pending: Optional[str] = None
+
+    def put(self, name: str) -> None:
+        with self._lock:
+            self._pending = name
+            self._event.set()
+
+    def has_pending(self) -> bool:
+        # Lock-free check so the render loop only locks when a mood arrived.
+        return self._event.is_set()
+
+    def take(self) -> Optional[str]:
+        with self._lock:
+            name, self._pending = self._pending, None
+            self._event.clear()
+        return name
+
 
 class RosSubscriber(Node):
-    def __init__(self, q_mood: Queue):
+    def __init__(self, mood_slot: MoodSlot):
         super().__init__("robot_face_sub")
         
-        self.q_mood   = q_mood
+        self.mood_slot      = mood_slot
         self._last_command  = DEFAULT_MOOD
 
         self.subscription = self.create_subscription(
@@ -34,22 +130,26 @@ class RosSubscriber(Node):
     def _callback(self, msg: String) -> None:
         cmd = msg.data.strip().upper()
         if cmd and cmd != self._last_command:
-            self.q_mood.put(cmd)
+            self.mood_slot.put(cmd)
             self._last_command = cmd
 
 
 class RobotFaceUI:
     def __init__(
         self,
-        screen: pygame.Surface,
+        screen: Optional[pygame.Surface],
         mood_dir: str,
         default_mood: str,
         frame_delay_ms: int,
-        q_mood: Queue,
+        mood_slot: MoodSlot,
+        frame_depth: int = 0,
+        renderer: Optional[Renderer] = None,
     ):
         self.screen = screen
         self.frame_delay_ms = frame_delay_ms
-        self.q_mood = q_mood
+        self.frame_depth = frame_depth
+        self.renderer = renderer
+        self.mood_slot = mood_slot
 
         self.moods = self._load_all_moods(mood_dir)
         if not self.moods:
@@ -58,13 +158,34 @@ class RobotFaceUI:
         if default_mood not in self.moods:
             default_mood = sorted(self.moods.keys())[0]
 
+        # Frames left at source size are scaled into one reusable buffer.
+        self.scale_buffer = None
+        if self.renderer is None:
+            self.scale_buffer = self._create_scale_buffer()
+
+        # Only the surface path skips clearing; renderers clear every frame.
+        self.opaque_fullscreen = (
+            self.renderer is None and self._frames_cover_screen()
+        )
+
+        # Per-frame blit sequences are built once so update() does one C call.
+        # The renderer draws textures directly and needs none.
+        self.draw_lists = {}
+        if self.renderer is None:
+            self.draw_lists = {
+                name: [[(self._draw_source(frame), (0, 0))] for frame in frames]
+                for name, frames in self.moods.items()
+            }
+
         self.default_mood = default_mood
         self.current_mood = default_mood
         self.current_name = default_mood
         self.current_frames = self.moods[default_mood]
+        self.current_draws = self.draw_lists.get(default_mood)
 
         self.index = 0
-        self.last_change = pygame.time.get_ticks()
+        self.dirty = True
+        pygame.time.set_timer(FRAME_EVENT, self.frame_delay_ms)
 
     def _check_queue(self) -> None:
         next_mood = self._get_next_valid_mood()
@@ -76,28 +197,51 @@ class RobotFaceUI:
             self.play(self.current_mood)
 
     def _get_next_valid_mood(self):
-        while True:
-            try:
-                name = self.q_mood.get_nowait()
-            except Empty:
-                return None
-
-            name = name.strip()
-            if not name:
-                continue
-
-            if name in self.moods:
-                return name
-
-            print(f"[WARN] Unknown mood '{name}' ignored.")
-
-    def _load_mood_frames(self, path: str):
-        frames = []
-        for img_name in sorted(os.listdir(path)):
-            if img_name.lower().endswith(".jpg"):
-                full_path = os.path.join(path, img_name)
-                frames.append(pygame.image.load(full_path).convert_alpha())
-        return frames
+        name = self.mood_slot.take()
+        if name is None:
+            return None
+
+        name = name.strip()
+        if not name:
+            return None
+
+        if name in self.moods:
+            return name
+
+        print(f"[WARN] Unknown mood '{name}' ignored.")
+        return None
+
+    def _create_scale_buffer(self) -> Optional[pygame.Surface]:
+        size = self.screen.get_size()
+        for frames in self.moods.values():
+            for frame in frames:
+                if frame.get_size() != size:
+                    # Same format as the frames, as the scalers require.
+                    return pygame.Surface(size, 0, frame)
+        return None
+
+    def _draw_source(self, frame: pygame.Surface) -> pygame.Surface:
+        if frame.get_size() != self.screen.get_size():
+            return self.scale_buffer
+        return frame
+
+    def _frames_cover_screen(self) -> bool:
+        # Opaque frames that fill the screen overwrite every pixel, which
+        # makes clearing before each draw wasted framebuffer bandwidth.
+        for frames in self.moods.values():
+            for frame in frames:
+                if frame.get_flags() & pygame.SRCALPHA:
+                    # Frames are either screen-sized or drawn via scale_buffer.
+                    return False
+        return True
+
+    def _list_mood_frames(self, path: str):
+        with os.scandir(path) as it:
+            entries = sorted(it, key=lambda entry: entry.name)
+        return [
+            entry.path for entry in entries
+            if entry.name.lower().endswith(".jpg")
+        ]
 
     def _load_all_moods(self, mood_dir: str):
         moods = {}
@@ -105,35 +249,96 @@ class RobotFaceUI:
             print(f"[ERROR] Mood directory '{mood_dir}' not found.")
             return moods
 
-        for name in sorted(os.listdir(mood_dir)):
-            full_path = os.path.join(mood_dir, name)
-            if os.path.isdir(full_path):
-                frames = self._load_mood_frames(full_path)
-                if frames:
-                    moods[name.upper()] = frames
+        # Frames are scaled to the screen once here so update() only blits.
+        # With a renderer they keep their size and the GPU scales on copy.
+        size = None if self.renderer else self.screen.get_size()
+
+        # A second player on the same directory reuses the loaded moods
+        # instead of scanning it again.
+        cache_key = (
+            os.path.realpath(mood_dir), size, self.frame_depth, self.renderer
+        )
+        if cache_key in _MOODS_CACHE:
+            return _MOODS_CACHE[cache_key]
+
+        # scandir reports entry types from readdir, avoiding a stat per entry.
+        with os.scandir(mood_dir) as it:
+            entries = sorted(it, key=lambda entry: entry.name)
+
+        mood_paths = {}
+        for entry in entries:
+            if entry.is_dir():
+                paths = self._list_mood_frames(entry.path)
+                if paths:
+                    mood_paths[entry.name.upper()] = paths
+
+        if size is not None:
+            # Pre-scaled frames cost a full screen of pixels each; past the
+            # limit they keep their source size and are scaled when drawn.
+            frame_count = sum(len(paths) for paths in mood_paths.values())
+            bytes_per_pixel = self.frame_depth // 8 or self.screen.get_bytesize()
+            prescaled_mb = frame_count * size[0] * size[1] * bytes_per_pixel / 2**20
+            if prescaled_mb > PRESCALE_LIMIT_MB:
+                print(
+                    f"[WARN] Pre-scaling {frame_count} frames needs "
+                    f"{prescaled_mb:.0f} MB; scaling each frame when drawn."
+                )
+                size = None
+
+        # Read-ahead for every mood is queued before the first decode, so
+        # storage I/O overlaps decoding instead of stalling it file by file.
+        for paths in mood_paths.values():
+            for path in paths:
+                _prefetch_file(path)
+
+        moods = _load_moods_cached(
+            mood_paths, size, self.frame_depth, self.renderer
+        )
 
         if not moods:
             print(f"[ERROR] No valid moods in '{mood_dir}'.")
+        else:
+            _MOODS_CACHE[cache_key] = moods
         return moods
 
-    def update(self) -> None:
-        now = pygame.time.get_ticks()
-        if now - self.last_change >= self.frame_delay_ms:
-            self.index = (self.index + 1) % len(self.current_frames)
-            self.last_change = now
-
-            if self.index == 0:
-                self._check_queue()
-
-        frame = self.current_frames[self.index]
-        screen_rect = self.screen.get_rect()
-        scaled = pygame.transform.smoothscale(
-            frame, (screen_rect.width, screen_rect.height)
-        )
-        self.screen.blit(scaled, (0, 0))
+    def advance(self) -> None:
+        # Driven by FRAME_EVENT, posted every frame_delay_ms by SDL's timer.
+        self.index = (self.index + 1) % len(self.current_frames)
+        self.dirty = True
+
+        if self.index == 0 and self.mood_slot.has_pending():
+            self._check_queue()
+
+    def update(self) -> bool:
+        # Returns whether the screen changed, so callers can skip the flip.
+        if not self.dirty:
+            return False
+
+        if self.renderer is not None:
+            # SDL leaves the backbuffer undefined after present, and a clear
+            # is cheaper than reloading tiles on tile-based GPUs.
+            self.renderer.clear()
+            self.current_frames[self.index].draw()
+        else:
+            if not self.opaque_fullscreen:
+                self.screen.fill((0, 0, 0))
+            frame = self.current_frames[self.index]
+            if frame.get_size() != self.screen.get_size():
+                self._scale_frame(frame)
+            self.screen.blits(self.current_draws[self.index], doreturn=False)
+        self.dirty = False
+        return True
+
+    def _scale_frame(self, frame: pygame.Surface) -> None:
+        size = self.screen.get_size()
+        if frame.get_bitsize() >= 24:
+            pygame.transform.smoothscale(frame, size, self.scale_buffer)
+        else:
+            # smoothscale only handles 24/32-bit surfaces (not --rgb565).
+            pygame.transform.scale(frame, size, self.scale_buffer)
 
     def add_to_queue(self, name: str) -> None:
-        self.q_mood.put(name)
+        self.mood_slot.put(name)
 
     def play(self, name: str) -> None:
         if name not in self.moods:
@@ -142,8 +347,22 @@ class RobotFaceUI:
 
         self.current_name = name
         self.current_frames = self.moods[name]
+        self.current_draws = self.draw_lists.get(name)
         self.index = 0
-        self.last_change = pygame.time.get_ticks()
+        self.dirty = True
+        # Restart the timer so the new mood's first frame gets a full delay.
+        pygame.time.set_timer(FRAME_EVENT, self.frame_delay_ms)
+
+
+def _positive_int(value: str) -> int:
+    # pygame.time.set_timer() treats 0 or less as "stop the timer".
+    try:
+        number = int(value)
+    except ValueError:
+        number = 0
+    if number <= 0:
+        raise argparse.ArgumentTypeError(f"must be a positive integer, got {value}")
+    return number
 
 
 # Public
@@ -161,23 +380,54 @@ def parse_args():
     )
     parser.add_argument(
         "-f", "--frame_delay",
-        type=int,
+        type=_positive_int,
         default=DEFAULT_FRAME_DELAY_MS,
         help="Delay between frames in milliseconds.",
     )
-    return parser.parse_args()
+    parser.add_argument(
+        "-c", "--rgb565",
+        action="store_true",
+        help="Store frames as 16-bit RGB565 to halve memory use and bandwidth.",
+    )
+    parser.add_argument(
+        "-g", "--gpu",
+        action="store_true",
+        help="Draw frames as GPU textures through an accelerated SDL renderer.",
+    )
+    args = parser.parse_args()
+    if args.gpu and args.rgb565:
+        parser.error("--rgb565 has no effect with --gpu; textures use the renderer's format.")
+    return args
 
 def main() -> int:
     args = parse_args()
 
+    # Already SDL's default for X11; pinned so an inherited "0" can't
+    # reintroduce compositing of the fullscreen face.
+    os.environ.setdefault("SDL_VIDEO_X11_NET_WM_BYPASS_COMPOSITOR", "1")
+    # GPU mode stretches source-size textures; SDL defaults to nearest.
+    os.environ.setdefault("SDL_RENDER_SCALE_QUALITY", "linear")
+
     pygame.init()
-    screen = pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
-    clock = pygame.time.Clock()
+    if args.gpu:
+        # SDL refuses a renderer on a window that already has a display
+        # surface, so GPU mode opens its own window instead of set_mode().
+        # It is exclusive fullscreen at desktop size: no compositor copy.
+        screen = None
+        window = Window(
+            "Robot Face",
+            size=pygame.display.get_desktop_sizes()[0],
+            fullscreen=True,
+        )
+        renderer = Renderer(window, accelerated=1, vsync=True)
+    else:
+        screen = pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
+        renderer = None
 
-    q_moods: Queue = Queue()
+    mood_slot = MoodSlot()
 
     rclpy.init()
-    ros_subscriber = RosSubscriber(q_moods)
+    ros_subscriber = RosSubscriber(mood_slot)
     thread_rossub = threading.Thread(target=rclpy.spin, args=(ros_subscriber,), daemon=True)
     thread_rossub.start()
 
@@ -186,7 +436,9 @@ def main() -> int:
         mood_dir      = args.path,
         default_mood  = args.default_mood,
         frame_delay_ms= args.frame_delay,
-        q_mood        = q_moods,
+        mood_slot     = mood_slot,
+        frame_depth   = RGB565_DEPTH if args.rgb565 else 0,
+        renderer      = renderer,
     )
 
     print(f"Robot moods found: {list(player.moods.keys())}")
@@ -194,17 +446,22 @@ def main() -> int:
     running = True
     try:
         while running:
-            screen.fill((0, 0, 0))
-
-            for event in pygame.event.get():
+            # Draw before waiting so the startup frame appears immediately.
+            if player.update():
+                if renderer is not None:
+                    renderer.present()
+                else:
+                    pygame.display.flip()
+
+            # Block in SDL until the frame timer or input fires, so Python
+            # only runs when a frame advances instead of spinning at 60 Hz.
+            for event in [pygame.event.wait(), *pygame.event.get()]:
                 if event.type == pygame.QUIT:
                     running = False
                 if event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
                     running = False
-
-            player.update()
-            pygame.display.flip()
-            clock.tick(60)
+                if event.type == FRAME_EVENT:
+                    player.advance()
     finally:
         pygame.quit()
         ros_subscriber.destroy_node()